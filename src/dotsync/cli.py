@@ -5,7 +5,19 @@ import click
 from dotsync import __version__
 
 
-@click.group()
+class _Group(click.Group):
+    """Report config errors as a clean CLI error instead of a traceback."""
+
+    def invoke(self, ctx):
+        from dotsync.schema import ConfigError
+
+        try:
+            return super().invoke(ctx)
+        except ConfigError as e:
+            raise click.ClickException(str(e)) from e
+
+
+@click.group(cls=_Group)
 @click.version_option(version=__version__, prog_name="dotsync")
 def cli():
     """Fleet-style dotfiles manager.
@@ -24,11 +36,12 @@ def status():
 
 
 @cli.command()
-def push():
+@click.option("--retry-failed", is_flag=True, help="Re-cascade only to machines that failed last push.")
+def push(retry_failed: bool):
     """Auto-commit, push, and cascade to fleet."""
     from dotsync.sync import push_dotfiles
 
-    push_dotfiles()
+    push_dotfiles(retry_failed=retry_failed)
 
 
 @cli.command()
@@ -39,12 +52,40 @@ def pull():
     pull_dotfiles()
 
 
+def _check_since(ctx, param, value: str) -> str:
+    from dotsync.history import parse_since
+
+    try:
+        parse_since(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e)) from e
+    return value
+
+
+@cli.command()
+@click.option("--machine", default=None, help="Only show this machine.")
+@click.option(
+    "--since", default="7d", show_default=True, callback=_check_since,
+    help="Time window, e.g. 12h, 7d, 2w.",
+)
+def history(machine: str | None, since: str):
+    """Show fleet history — cascade latency, failures, and drift per machine."""
+    from dotsync.history import show_history
+
+    show_history(machine=machine, since=since)
+
+
 @cli.command()
-def setup():
+@click.option(
+    "--sparse", is_flag=True,
+    help="Partial clone that checks out only the files this machine links or brews from.",
+)
+@click.option("--name", default=None, help="This machine's fleet name (defaults to its hostname).")
+def setup(sparse: bool, name: str | None):
     """Bootstrap this machine (SSH key, GitHub, clone, link, brew)."""
     from dotsync.setup_machine import bootstrap
 
-    bootstrap()
+    bootstrap(sparse=sparse, name=name)
 
 
 @cli.command()
@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import platform
 import sys
-from dataclasses import dataclass, field
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from pathlib import Path
 
 import tomli_w
 
+from dotsync.schema import ConfigError, validate
+
 if sys.version_info >= (3, 11):
     import tomllib
 else:
@@ -16,11 +22,44 @@ else:
 
 DEFAULT_CONFIG_PATH = Path.home() / ".dotfiles" / ".dotsync.toml"
 
+# Per-machine runtime state (host health, last push results). Kept outside the
+# dotfiles repo so `push` never auto-commits it.
+DEFAULT_STATE_DIR = Path.home() / ".local" / "state" / "dotsync"
+
+# Digests of config files that already passed schema validation.
+VALIDATED_CONFIGS_PATH = DEFAULT_STATE_DIR / "validated-configs"
+
+# Parsed, validated TOML per config path, keyed by (mtime_ns, size) so that
+# the many load_config() calls within one command parse the file only once.
+_parsed: dict[Path, tuple[tuple[int, int], dict]] = {}
+
+# Where a cascade leaves each host its precomputed plan (and fleet name),
+# inside .git so it's never committed.
+PLAN_FILE = "dotsync-plan.json"
+
+# Effective per-machine plans keyed by a hash of the inputs they're merged
+# from, so machines with identical overrides share one computed plan.
+_plans: dict[str, MachinePlan] = {}
+
 
 @dataclass
 class Machine:
     name: str
     ssh_alias: str
+    links: dict[str, str] = field(default_factory=dict)
+    skip_links: list[str] = field(default_factory=list)
+    brewfile: str | None = None
+    # Config file this machine was declared in (None for the main file).
+    origin: Path | None = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class MachinePlan:
+    """What one machine actually uses once global config and its overrides are merged."""
+
+    links: dict[str, str]
+    brewfile: str
+    digest: str
 
 
 @dataclass
@@ -31,6 +70,11 @@ class Config:
     brewfile: str = "Brewfile"
     pending_file: str = ".brew-pending"
     machines: list[Machine] = field(default_factory=list)
+    include: list[str] = field(default_factory=list)
+    # Config files this was loaded from: the main file, then its includes.
+    sources: list[Path] = field(default_factory=list, compare=False, repr=False)
+    # Hash of the source files' contents, to tell whether a plan record is current.
+    digest: str = field(default="", compare=False, repr=False)
 
     @property
     def dotfiles_dir(self) -> Path:
@@ -40,40 +84,222 @@ class Config:
     def config_path(self) -> Path:
         return self.dotfiles_dir / ".dotsync.toml"
 
+    def plan_for(self, machine: Machine) -> MachinePlan:
+        """The machine's effective links and Brewfile, memoized by content hash."""
+        inputs = json.dumps(
+            [self.links, self.brewfile, machine.links, machine.skip_links, machine.brewfile],
+            sort_keys=True,
+        )
+        digest = hashlib.blake2b(inputs.encode(), digest_size=16).hexdigest()
+        plan = _plans.get(digest)
+        if plan is None:
+            skip = set(machine.skip_links)
+            links = {src: dst for src, dst in self.links.items() if src not in skip}
+            links.update(machine.links)
+            plan = _plans[digest] = MachinePlan(links, machine.brewfile or self.brewfile, digest)
+        return plan
+
+    @property
+    def plan_path(self) -> Path:
+        return self.dotfiles_dir / ".git" / PLAN_FILE
+
+    def plan_record(self, machine: Machine) -> str:
+        """JSON a cascade sends a host: its fleet name and precomputed plan."""
+        plan = self.plan_for(machine)
+        return json.dumps({
+            "machine": machine.name,
+            "config_digest": self.digest,
+            "digest": plan.digest,
+            "links": plan.links,
+            "brewfile": plan.brewfile,
+        }, sort_keys=True)
+
+    def read_plan_record(self) -> dict:
+        """The plan record left in this checkout by a cascade or setup, or {}."""
+        try:
+            record = json.loads(self.plan_path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return record if isinstance(record, dict) else {}
+
+    def record_machine_name(self, name: str) -> None:
+        """Remember this checkout's fleet name for when it differs from the hostname."""
+        self.plan_path.parent.mkdir(parents=True, exist_ok=True)
+        self.plan_path.write_text(json.dumps({"machine": name}) + "\n")
+
+    def machine_name(self) -> str:
+        """This machine's fleet name: the recorded one, else its short hostname."""
+        name = self.read_plan_record().get("machine")
+        return name if isinstance(name, str) and name else local_machine_name()
+
+    def effective(self, name: str | None = None) -> Config:
+        """This config as seen by one machine (this one by default).
+
+        For this machine, a plan record sent by the cascade is used as-is when
+        it was computed from the same config contents; otherwise the merge is
+        resolved here under the recorded fleet name. Machines not in the fleet
+        get the global links and Brewfile.
+        """
+        if name is None:
+            record = self.read_plan_record()
+            if (
+                self.digest
+                and record.get("config_digest") == self.digest
+                and isinstance(record.get("links"), dict)
+                and isinstance(record.get("brewfile"), str)
+            ):
+                return replace(self, links=dict(record["links"]), brewfile=record["brewfile"])
+            name = self.machine_name()
+
+        machine = next((m for m in self.machines if m.name == name), None)
+        if machine is None:
+            return self
+        plan = self.plan_for(machine)
+        return replace(self, links=dict(plan.links), brewfile=plan.brewfile)
+
+
+def local_machine_name() -> str:
+    """This machine's short, lower-cased hostname."""
+    return platform.node().split(".")[0].lower()
+
+
+def _read_config(config_path: Path) -> dict:
+    """Parse and validate a config file, reusing the last result if it hasn't changed."""
+    st = config_path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _parsed.get(config_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    raw = config_path.read_bytes()
+    try:
+        data = tomllib.loads(raw.decode())
+    except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+        raise ConfigError(f"{config_path}: {e}") from None
+    validate(data, raw, config_path, cache=VALIDATED_CONFIGS_PATH)
+
+    _parsed[config_path] = (stamp, data)
+    return data
+
+
+def _merge(base: dict, override: dict) -> dict:
+    """Deep-merge two config tables; [[machines]] from both are kept, in order."""
+    merged = dict(base)
+    for key, value in override.items():
+        if key == "machines":
+            merged[key] = [*merged.get(key, []), *value]
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _resolve(
+    config_path: Path,
+    stack: tuple[Path, ...] = (),
+    sources: list[Path] | None = None,
+) -> dict:
+    """Load a config file with its includes merged underneath it.
+
+    Included files are relative to the file that includes them and are applied
+    in order; the including file's own settings win.
+    """
+    if config_path in stack:
+        chain = " -> ".join(str(p) for p in (*stack, config_path))
+        raise ConfigError(f"include cycle: {chain}")
+    if not config_path.exists():
+        raise ConfigError(f"{stack[-1]}: included file not found: {config_path}")
+
+    data = _read_config(config_path)
+    if sources is not None:
+        sources.append(config_path)
+    own = {k: v for k, v in data.items() if k != "include"}
+    if stack:
+        own["machines"] = [{**m, "_origin": config_path} for m in own.get("machines", [])]
+
+    merged: dict = {}
+    for include in data.get("include", []):
+        include_path = (config_path.parent / Path(include).expanduser()).resolve()
+        merged = _merge(merged, _resolve(include_path, (*stack, config_path), sources))
+    return _merge(merged, own)
+
+
+def _sources_digest(sources: list[Path]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for source in sources:
+        h.update(source.read_bytes())
+        h.update(b"\0")
+    return h.hexdigest()
+
 
 def load_config(path: Path | None = None) -> Config:
-    """Load config from TOML file. Returns defaults if file doesn't exist."""
+    """Load config from TOML file. Returns defaults if file doesn't exist.
+
+    Raises ConfigError if the file (or anything it includes) can't be parsed or
+    doesn't match the schema.
+    """
     config_path = path or DEFAULT_CONFIG_PATH
     if not config_path.exists():
         return Config()
 
-    with open(config_path, "rb") as f:
-        data = tomllib.load(f)
+    config_path = config_path.resolve()
+    sources: list[Path] = []
+    data = _resolve(config_path, sources=sources)
 
     ds = data.get("dotsync", {})
     brew = data.get("brew", {})
     machines_raw = data.get("machines", [])
 
     machines = [
-        Machine(name=m["name"], ssh_alias=m.get("ssh_alias", m["name"]))
+        Machine(
+            name=m["name"],
+            ssh_alias=m.get("ssh_alias", m["name"]),
+            links=dict(m.get("links", {})),
+            skip_links=list(m.get("skip_links", [])),
+            brewfile=m.get("brewfile"),
+            origin=m.get("_origin"),
+        )
         for m in machines_raw
     ]
 
+    seen: dict[str, Path] = {}
+    for m in machines:
+        where = m.origin or config_path
+        if m.name in seen:
+            raise ConfigError(f"machine '{m.name}' is defined in both {seen[m.name]} and {where}")
+        seen[m.name] = where
+
     return Config(
         repo=ds.get("repo", ""),
         dotfiles_path=ds.get("dotfiles_path", "~/.dotfiles"),
-        links=data.get("links", {}),
+        links=dict(data.get("links", {})),
         brewfile=brew.get("brewfile", "Brewfile"),
         pending_file=brew.get("pending_file", ".brew-pending"),
         machines=machines,
+        include=list(_read_config(config_path).get("include", [])),
+        sources=sources,
+        digest=_sources_digest(sources),
     )
 
 
+def _machine_table(m: Machine) -> dict:
+    table: dict = {"name": m.name, "ssh_alias": m.ssh_alias}
+    if m.brewfile:
+        table["brewfile"] = m.brewfile
+    if m.skip_links:
+        table["skip_links"] = m.skip_links
+    if m.links:
+        table["links"] = m.links
+    return table
+
+
 def save_config(config: Config, path: Path | None = None) -> None:
     """Save config to TOML file."""
     config_path = path or config.config_path
 
     data: dict = {
+        **({"include": config.include} if config.include else {}),
         "dotsync": {
             "repo": config.repo,
             "dotfiles_path": config.dotfiles_path,
@@ -83,10 +309,7 @@ def save_config(config: Config, path: Path | None = None) -> None:
             "brewfile": config.brewfile,
             "pending_file": config.pending_file,
         },
-        "machines": [
-            {"name": m.name, "ssh_alias": m.ssh_alias}
-            for m in config.machines
-        ],
+        "machines": [_machine_table(m) for m in config.machines if m.origin is None],
     }
 
     config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -94,6 +317,27 @@ def save_config(config: Config, path: Path | None = None) -> None:
         tomli_w.dump(data, f)
 
 
+def _edit_machines(config: Config, edit: Callable[[list[dict]], None]) -> None:
+    """Apply ``edit`` to the main config file's own [[machines]] and write it back.
+
+    Works on the file's raw tables so settings pulled in via ``include`` aren't
+    copied into it.
+    """
+    config_path = config.config_path
+    if not config_path.exists():
+        save_config(config, config_path)
+
+    with open(config_path, "rb") as f:
+        data = tomllib.load(f)
+    machines = data.setdefault("machines", [])
+    edit(machines)
+    if not machines:
+        del data["machines"]
+
+    with open(config_path, "wb") as f:
+        tomli_w.dump(data, f)
+
+
 def add_machine(name: str, ssh_alias: str | None = None) -> None:
     """Add a machine to the config."""
     from rich.console import Console
@@ -105,8 +349,9 @@ def add_machine(name: str, ssh_alias: str | None = None) -> None:
         console.print(f"[yellow]Machine '{name}' already exists in config.[/yellow]")
         return
 
-    config.machines.append(Machine(name=name, ssh_alias=ssh_alias or name))
-    save_config(config)
+    _edit_machines(config, lambda machines: machines.append(
+        {"name": name, "ssh_alias": ssh_alias or name}
+    ))
     console.print(f"[green]Added machine '{name}' (ssh: {ssh_alias or name})[/green]")
 
 
@@ -117,12 +362,16 @@ def remove_machine(name: str) -> None:
     console = Console()
     config = load_config()
 
-    original_count = len(config.machines)
-    config.machines = [m for m in config.machines if m.name != name]
-
-    if len(config.machines) == original_count:
+    machine = next((m for m in config.machines if m.name == name), None)
+    if machine is None:
         console.print(f"[yellow]Machine '{name}' not found in config.[/yellow]")
         return
+    if machine.origin is not None:
+        console.print(f"[yellow]Machine '{name}' is defined in {machine.origin}; remove it there.[/yellow]")
+        return
+
+    def drop(machines: list[dict]) -> None:
+        machines[:] = [m for m in machines if m.get("name") != name]
 
-    save_config(config)
+    _edit_machines(config, drop)
     console.print(f"[green]Removed machine '{name}'[/green]")
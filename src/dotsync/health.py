@@ -0,0 +1,81 @@
+"""Per-host health records and last push results, persisted between runs."""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from dotsync.config import DEFAULT_STATE_DIR
+
+# A host that has failed this many times in a row is skipped until the
+# cool-down has passed; the next run after that gets one attempt to recover.
+FAILURE_THRESHOLD = 2
+COOLDOWN_SECONDS = 300
+
+
+@dataclass
+class HostHealth:
+    failures: int = 0
+    last_failure: float = 0.0
+
+    def is_tripped(self, now: float) -> bool:
+        return self.failures >= FAILURE_THRESHOLD and now - self.last_failure < COOLDOWN_SECONDS
+
+
+class HealthStore:
+    """Consecutive-failure counts per machine name, stored as JSON."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or DEFAULT_STATE_DIR / "health.json"
+        self.hosts: dict[str, HostHealth] = {}
+        if self.path.exists():
+            try:
+                raw = json.loads(self.path.read_text())
+                self.hosts = {name: HostHealth(**h) for name, h in raw.items()}
+            except (ValueError, TypeError, AttributeError):
+                self.hosts = {}
+
+    def cooldown_ends(self, name: str) -> float:
+        """When a tripped host will next be tried (epoch seconds)."""
+        health = self.hosts.get(name)
+        return health.last_failure + COOLDOWN_SECONDS if health else 0.0
+
+    def should_skip(self, name: str) -> bool:
+        health = self.hosts.get(name)
+        return health is not None and health.is_tripped(time.time())
+
+    def record(self, name: str, ok: bool) -> None:
+        if ok:
+            self.hosts.pop(name, None)
+            return
+        health = self.hosts.setdefault(name, HostHealth())
+        health.failures += 1
+        health.last_failure = time.time()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({n: asdict(h) for n, h in self.hosts.items()}, indent=2))
+
+
+def _push_result_path(state_dir: Path | None) -> Path:
+    return (state_dir or DEFAULT_STATE_DIR) / "last-push.json"
+
+
+def save_push_result(ok: list[str], failed: list[str], state_dir: Path | None = None) -> None:
+    """Record which machines the last cascade reached and which it didn't."""
+    path = _push_result_path(state_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"time": time.time(), "ok": ok, "failed": failed}, indent=2))
+
+
+def load_failed_hosts(state_dir: Path | None = None) -> list[str]:
+    """Machine names that failed (or were skipped) in the last cascade."""
+    path = _push_result_path(state_dir)
+    if not path.exists():
+        return []
+    try:
+        return list(json.loads(path.read_text()).get("failed", []))
+    except (ValueError, AttributeError):
+        return []
@@ -0,0 +1,189 @@
+"""Local history of status probes and push cascades, with trend queries."""
+
+from __future__ import annotations
+
+import math
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from dotsync.config import DEFAULT_STATE_DIR
+
+DEFAULT_HISTORY_PATH = DEFAULT_STATE_DIR / "history.db"
+RETENTION_DAYS = 90
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    ts       REAL    NOT NULL,
+    machine  TEXT    NOT NULL,
+    kind     TEXT    NOT NULL,  -- 'status' or 'push'
+    ok       INTEGER NOT NULL,
+    duration REAL,
+    changed  INTEGER            -- uncommitted files seen by a status probe
+);
+CREATE INDEX IF NOT EXISTS events_machine_kind_ts ON events (machine, kind, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+"""
+
+_SINCE = re.compile(r"^(\d+)([mhdw])$")
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+@dataclass
+class Event:
+    machine: str
+    kind: str
+    ok: bool
+    duration: float | None = None
+    changed: int | None = None
+
+
+@dataclass
+class MachineSummary:
+    machine: str
+    pushes: int
+    push_failures: int
+    p50: float | None
+    p95: float | None
+    probes: int
+    unreachable: int
+    dirty: int
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def record_events(events: list[Event], path: Path | None = None) -> None:
+    """Append events in one transaction and drop anything past retention."""
+    if not events:
+        return
+    now = time.time()
+    conn = _connect(path or DEFAULT_HISTORY_PATH)
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO events (ts, machine, kind, ok, duration, changed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(now, e.machine, e.kind, int(e.ok), e.duration, e.changed) for e in events],
+            )
+            conn.execute("DELETE FROM events WHERE ts < ?", (now - RETENTION_DAYS * 86400,))
+    finally:
+        conn.close()
+
+
+def parse_since(value: str) -> float:
+    """Turn '30m', '12h', '7d' or '2w' into a duration in seconds."""
+    match = _SINCE.match(value.strip())
+    if not match:
+        raise ValueError(f"invalid duration {value!r} (expected e.g. 30m, 12h, 7d, 2w)")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(
+    since: float,
+    machine: str | None = None,
+    path: Path | None = None,
+) -> list[MachineSummary]:
+    """Per-machine counts and cascade latency percentiles for the last ``since`` seconds."""
+    history_path = path or DEFAULT_HISTORY_PATH
+    if not history_path.exists():
+        return []
+
+    cutoff = time.time() - since
+    conn = _connect(history_path)
+    try:
+        # Only machines with events in the window, so an unknown name yields nothing.
+        query = "SELECT DISTINCT machine FROM events WHERE ts >= ?"
+        params: tuple = (cutoff,)
+        if machine:
+            query += " AND machine = ?"
+            params += (machine,)
+        machines = [row[0] for row in conn.execute(query + " ORDER BY machine", params)]
+
+        summaries = []
+        for name in machines:
+            # Both queries are range scans on (machine, kind, ts).
+            durations = [
+                row[0] for row in conn.execute(
+                    "SELECT duration FROM events "
+                    "WHERE machine = ? AND kind = 'push' AND ts >= ? AND ok AND duration IS NOT NULL "
+                    "ORDER BY duration",
+                    (name, cutoff),
+                )
+            ]
+            pushes, push_failures = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(NOT ok), 0) FROM events "
+                "WHERE machine = ? AND kind = 'push' AND ts >= ?",
+                (name, cutoff),
+            ).fetchone()
+            probes, unreachable, dirty = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(NOT ok), 0), COALESCE(SUM(changed > 0), 0) "
+                "FROM events WHERE machine = ? AND kind = 'status' AND ts >= ?",
+                (name, cutoff),
+            ).fetchone()
+            summaries.append(MachineSummary(
+                machine=name,
+                pushes=pushes,
+                push_failures=push_failures,
+                p50=_percentile(durations, 50),
+                p95=_percentile(durations, 95),
+                probes=probes,
+                unreachable=unreachable,
+                dirty=dirty,
+            ))
+        return summaries
+    finally:
+        conn.close()
+
+
+def show_history(machine: str | None = None, since: str = "7d") -> None:
+    """Print per-machine push and status trends."""
+    console = Console()
+    summaries = summarize(parse_since(since), machine=machine)
+    if not summaries:
+        console.print(f"[yellow]No history in the last {since}.[/yellow]")
+        return
+
+    def fmt(seconds: float | None) -> str:
+        return "—" if seconds is None else f"{seconds:.1f}s"
+
+    table = Table(title=f"dotsync history (last {since})")
+    table.add_column("Machine", style="cyan")
+    table.add_column("Pushes", justify="right")
+    table.add_column("Failed", justify="right", style="red")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Probes", justify="right")
+    table.add_column("Unreachable", justify="right", style="red")
+    table.add_column("Dirty", justify="right", style="yellow")
+
+    for s in summaries:
+        table.add_row(
+            s.machine,
+            str(s.pushes),
+            str(s.push_failures),
+            fmt(s.p50),
+            fmt(s.p95),
+            str(s.probes),
+            str(s.unreachable),
+            str(s.dirty),
+        )
+
+    console.print(table)
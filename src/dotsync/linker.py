@@ -10,9 +10,9 @@ from dotsync.config import load_config
 
 
 def link_dotfiles() -> None:
-    """Create symlinks for all configured links."""
+    """Create symlinks for this machine's links (global links plus its overrides)."""
     console = Console()
-    config = load_config()
+    config = load_config().effective()
 
     if not config.links:
         console.print("[yellow]No links configured in .dotsync.toml.[/yellow]")
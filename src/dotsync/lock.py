@@ -0,0 +1,75 @@
+"""Advisory file locks that serialize git operations on the dotfiles repo."""
+
+from __future__ import annotations
+
+import fcntl
+import shlex
+from pathlib import Path
+from typing import IO
+
+from dotsync.config import DEFAULT_STATE_DIR
+
+REPO_LOCK = "dotsync.lock"
+PUSH_LOCK = "dotsync-push.lock"
+PUSH_PENDING = "dotsync-push.pending"
+
+# Runs argv under an exclusive flock on the lock file given as the first
+# argument. perl ships on both macOS and Linux, unlike flock(1).
+_REMOTE_LOCK_SCRIPT = (
+    'open(my $f, ">>", shift) or die "dotsync: cannot open lock: $!\\n"; '
+    'local $SIG{ALRM} = sub { die "dotsync: timed out waiting for repo lock\\n" }; '
+    "alarm shift; flock($f, LOCK_EX) or die \"dotsync: lock failed: $!\\n\"; alarm 0; "
+    "exit(system(@ARGV) >> 8)"
+)
+
+
+def lock_path(dotfiles_dir: Path, name: str) -> Path:
+    """Where a lock file lives: inside .git so it's never committed."""
+    git_dir = dotfiles_dir / ".git"
+    return (git_dir if git_dir.is_dir() else DEFAULT_STATE_DIR) / name
+
+
+class FileLock:
+    """An exclusive flock(2) on a file, released on close or process exit."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file: IO[str] | None = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def repo_lock(dotfiles_dir: Path) -> FileLock:
+    """Lock guarding git add/commit/push/pull in the dotfiles repo."""
+    return FileLock(lock_path(dotfiles_dir, REPO_LOCK))
+
+
+def remote_locked(command: str, timeout: int = 60) -> str:
+    """Wrap a remote git command so it takes the same repo lock as local dotsync.
+
+    Must run from inside the dotfiles directory on the remote.
+    """
+    script = shlex.quote(_REMOTE_LOCK_SCRIPT)
+    return f"perl -MFcntl=:flock -e {script} .git/{REPO_LOCK} {timeout} {command}"
@@ -0,0 +1,112 @@
+"""Pre-cascade checks: which machines can fast-forward to the pushed HEAD."""
+
+from __future__ import annotations
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
+
+from dotsync.config import Config, Machine
+from dotsync.ssh import MAX_PARALLEL, SSH_TRANSPORT_ERROR, RetryPolicy, run_remote
+
+PULL = "pull"
+UP_TO_DATE = "up-to-date"
+BLOCKED = "blocked"
+
+
+@dataclass
+class Preflight:
+    machine: Machine
+    action: str
+    reason: str = ""
+    reachable: bool = True
+
+
+def _porcelain_paths(status: str) -> set[str]:
+    """Paths from `git status --porcelain -z` output, both names for renames and copies.
+
+    With -z git prints paths verbatim (no quoting or octal escapes), so they
+    compare equal to `git diff --name-only -z`. A rename's record holds the
+    new name and is followed by one holding the old name.
+    """
+    paths = set()
+    records = iter(status.split("\0"))
+    for record in records:
+        if len(record) < 4:
+            continue
+        paths.add(record[3:])
+        if "R" in record[:2] or "C" in record[:2]:
+            paths.add(next(records, ""))
+    return paths - {""}
+
+
+def check_fleet(
+    config: Config,
+    machines: list[Machine],
+    head: str,
+    retry: RetryPolicy | None = None,
+) -> list[Preflight]:
+    """Probe every machine concurrently and decide whether to pull.
+
+    One SSH round trip per host fetches its HEAD and dirty files; the
+    ancestry and overlap checks then run against the local repo, so hosts
+    that can't fast-forward are never asked to fetch.
+    """
+    cwd = str(config.dotfiles_dir)
+    command = f"cd {config.dotfiles_path} && git rev-parse HEAD && git status --porcelain -z --untracked-files=all"
+
+    def git(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=False)
+
+    @cache
+    def incoming(remote_head: str) -> frozenset[str] | None:
+        """Files changed between a remote's HEAD and ours, or None if it can't fast-forward."""
+        if git("cat-file", "-e", f"{remote_head}^{{commit}}").returncode != 0:
+            return None
+        if git("merge-base", "--is-ancestor", remote_head, head).returncode != 0:
+            return None
+        diff = git("diff", "--name-only", "-z", remote_head, head).stdout
+        return frozenset(diff.split("\0")) - {""}
+
+    with ThreadPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+        results = list(pool.map(
+            # Porcelain output is small; keep all of it so no dirty path is missed.
+            lambda m: run_remote(m.ssh_alias, command, timeout=5, retry=retry, tail=None),
+            machines,
+        ))
+
+    checks = []
+    for machine, r in zip(machines, results):
+        if r.returncode != 0:
+            reachable = r.returncode != SSH_TRANSPORT_ERROR
+            reason = "unreachable" if not reachable else (
+                f"not a git checkout at {config.dotfiles_path}"
+            )
+            checks.append(Preflight(machine, BLOCKED, reason, reachable))
+            continue
+
+        remote_head, _, status = r.stdout.partition("\n")
+        if remote_head == head:
+            checks.append(Preflight(machine, UP_TO_DATE))
+            continue
+
+        changed = incoming(remote_head)
+        if changed is None:
+            checks.append(Preflight(
+                machine, BLOCKED,
+                f"diverged (at {remote_head[:8]}); push or rebase its commits on the host",
+            ))
+            continue
+
+        conflicts = sorted(_porcelain_paths(status) & changed)
+        if conflicts:
+            shown = ", ".join(conflicts[:3]) + (f" +{len(conflicts) - 3} more" if len(conflicts) > 3 else "")
+            checks.append(Preflight(
+                machine, BLOCKED,
+                f"local edits to {shown} would be overwritten; commit or stash them on the host",
+            ))
+            continue
+
+        checks.append(Preflight(machine, PULL))
+    return checks
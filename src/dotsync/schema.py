@@ -0,0 +1,213 @@
+"""Schema validation for .dotsync.toml with line-numbered error reporting."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Callable
+from pathlib import Path
+
+# Bump when the schema changes so configs validated by an older version are rechecked.
+SCHEMA_VERSION = 2
+
+# How many validated config digests to remember.
+_VALIDATED_KEEP = 16
+
+KeyPath = tuple[str | int, ...]
+Issue = tuple[KeyPath, str]
+Validator = Callable[[object, KeyPath, list[Issue]], None]
+
+
+class ConfigError(ValueError):
+    """The config file is malformed or doesn't match the schema."""
+
+
+def _type_name(value: object) -> str:
+    return {dict: "table", list: "array", str: "string"}.get(type(value), type(value).__name__)
+
+
+def _string(non_empty: bool = False) -> Validator:
+    def check(value, where, issues):
+        if not isinstance(value, str):
+            issues.append((where, f"expected a string, got {_type_name(value)}"))
+        elif non_empty and not value.strip():
+            issues.append((where, "must not be empty"))
+    return check
+
+
+def _array_of(item: Validator) -> Validator:
+    def check(value, where, issues):
+        if not isinstance(value, list):
+            issues.append((where, f"expected an array, got {_type_name(value)}"))
+            return
+        for i, entry in enumerate(value):
+            item(entry, where + (i,), issues)
+    return check
+
+
+def _table(
+    fields: dict[str, Validator],
+    required: tuple[str, ...] = (),
+    values: Validator | None = None,
+) -> Validator:
+    """A table with known ``fields``, or arbitrary keys whose values match ``values``."""
+    def check(value, where, issues):
+        if not isinstance(value, dict):
+            issues.append((where, f"expected a table, got {_type_name(value)}"))
+            return
+        for key in required:
+            if key not in value:
+                issues.append((where, f"missing required key '{key}'"))
+        for key, item in value.items():
+            field = fields.get(key, values)
+            if field is None:
+                issues.append((where + (key,), f"unknown key '{key}'"))
+            else:
+                field(item, where + (key,), issues)
+    return check
+
+
+def _array_of_tables(item: Validator, unique: str) -> Validator:
+    def check(value, where, issues):
+        if not isinstance(value, list):
+            issues.append((where, f"expected an array of tables ([[{where[-1]}]]), got {_type_name(value)}"))
+            return
+        seen: set[object] = set()
+        for i, entry in enumerate(value):
+            item(entry, where + (i,), issues)
+            key = entry.get(unique) if isinstance(entry, dict) else None
+            if isinstance(key, str):
+                if key in seen:
+                    issues.append((where + (i, unique), f"duplicate {unique} '{key}'"))
+                seen.add(key)
+    return check
+
+
+# Built once, at import, into nested closures; validating a file is then a
+# single walk over its data with no per-call schema interpretation.
+_LINKS = _table({}, values=_string(non_empty=True))
+
+_SCHEMA: Validator = _table({
+    "include": _array_of(_string(non_empty=True)),
+    "dotsync": _table({
+        "repo": _string(),
+        "dotfiles_path": _string(non_empty=True),
+    }),
+    "links": _LINKS,
+    "brew": _table({
+        "brewfile": _string(non_empty=True),
+        "pending_file": _string(non_empty=True),
+    }),
+    "machines": _array_of_tables(
+        _table(
+            {
+                "name": _string(non_empty=True),
+                "ssh_alias": _string(non_empty=True),
+                "brewfile": _string(non_empty=True),
+                "skip_links": _array_of(_string(non_empty=True)),
+                "links": _LINKS,
+            },
+            required=("name",),
+        ),
+        unique="name",
+    ),
+})
+
+
+_HEADER = re.compile(r"^\s*(\[\[?)\s*(.+?)\s*\]\]?\s*(#.*)?$")
+_KEY = re.compile(r'^\s*("(?:[^"\\]|\\.)*"|\'[^\']*\'|[A-Za-z0-9_\-.\s"\']+?)\s*=')
+
+
+def _split_key(key: str) -> tuple[str, ...]:
+    """Split a dotted TOML key, respecting quoted segments."""
+    parts = re.findall(r'"((?:[^"\\]|\\.)*)"|\'([^\']*)\'|([^.\s]+)', key)
+    return tuple(a or b or c for a, b, c in parts)
+
+
+def _line_index(text: str) -> dict[KeyPath, int]:
+    """Map key paths to the line that defines them.
+
+    A light scan of headers and ``key =`` lines, good enough to point at the
+    right place; anything it can't place falls back to its table's header.
+    """
+    index: dict[KeyPath, int] = {}
+    arrays: dict[tuple[str, ...], int] = {}
+    table: KeyPath = ()
+
+    for lineno, line in enumerate(text.splitlines(), 1):
+        header = _HEADER.match(line)
+        if header:
+            names = _split_key(header.group(2))
+            # Nested headers like [machines.links] land in the latest [[machines]].
+            resolved: list[str | int] = []
+            for i, name in enumerate(names):
+                resolved.append(name)
+                if names[: i + 1] in arrays and i + 1 < len(names):
+                    resolved.append(arrays[names[: i + 1]])
+            if header.group(1) == "[[":
+                arrays[names] = arrays.get(names, -1) + 1
+                resolved.append(arrays[names])
+            table = tuple(resolved)
+            index.setdefault(table, lineno)
+            continue
+        key = _KEY.match(line)
+        if key and not line.lstrip().startswith("#"):
+            index.setdefault(table + _split_key(key.group(1)), lineno)
+    return index
+
+
+def _format_path(where: KeyPath) -> str:
+    out = ""
+    for part in where:
+        if isinstance(part, int):
+            out += f"[{part}]"
+        elif re.fullmatch(r"[A-Za-z0-9_-]+", part):
+            out += f".{part}" if out else part
+        else:
+            out += f'."{part}"' if out else f'"{part}"'
+    return out or "(top level)"
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw + f"\0schema{SCHEMA_VERSION}".encode(), digest_size=16).hexdigest()
+
+
+def _known_valid(cache: Path, digest: str) -> bool:
+    try:
+        return digest in cache.read_text().split()
+    except OSError:
+        return False
+
+
+def _remember_valid(cache: Path, digest: str) -> None:
+    try:
+        known = cache.read_text().split() if cache.exists() else []
+        known = [d for d in known if d != digest][-(_VALIDATED_KEEP - 1):] + [digest]
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        cache.write_text("\n".join(known) + "\n")
+    except OSError:
+        pass  # Caching is best-effort; we'll just validate again next time.
+
+
+def validate(data: dict, raw: bytes, path: Path, cache: Path | None = None) -> None:
+    """Check parsed config data against the schema, raising ConfigError listing every problem.
+
+    With a ``cache`` file, contents that already passed are skipped.
+    """
+    digest = _digest(raw)
+    if cache and _known_valid(cache, digest):
+        return
+
+    issues: list[Issue] = []
+    _SCHEMA(data, (), issues)
+    if issues:
+        index = _line_index(raw.decode(errors="replace"))
+        lines = []
+        for where, message in issues:
+            lineno = next((index[where[:n]] for n in range(len(where), 0, -1) if where[:n] in index), None)
+            location = f"{path}:{lineno}" if lineno else str(path)
+            lines.append(f"{location}: {_format_path(where)}: {message}")
+        raise ConfigError("invalid config:\n  " + "\n  ".join(lines))
+
+    if cache:
+        _remember_valid(cache, digest)
@@ -5,13 +5,16 @@ from __future__ import annotations
 import platform
 import subprocess
 import webbrowser
+from functools import partial
 from pathlib import Path
 
 from rich.console import Console
 from rich.prompt import Confirm
 
-from dotsync.config import load_config
+from dotsync.config import Config, load_config
 from dotsync.linker import link_dotfiles
+from dotsync.sparse import config_closure, set_sparse, sparse_paths
+from dotsync.stream import LOG_DIR, LiveTails, print_failure, stream_run
 
 
 def _run(cmd: list[str], check: bool = True, **kwargs) -> subprocess.CompletedProcess:
@@ -52,24 +55,76 @@ def _add_key_to_github(console: Console, key_path: Path) -> None:
         input()
 
 
-def _clone_dotfiles(console: Console, repo: str, dotfiles_path: Path) -> None:
-    """Clone the dotfiles repo if the directory doesn't exist."""
+def _clone_dotfiles(
+    console: Console,
+    repo: str,
+    dotfiles_path: Path,
+    sparse: bool = False,
+    name: str | None = None,
+) -> None:
+    """Clone the dotfiles repo if the directory doesn't exist.
+
+    ``name`` is recorded in the clone as this machine's fleet name. With
+    ``sparse``, do a blobless partial clone and check out only what this
+    machine uses (see ``_narrow_checkout``).
+    """
     if dotfiles_path.exists():
         console.print(f"[dim]Dotfiles directory already exists at {dotfiles_path}[/dim]")
+        if sparse:
+            console.print(
+                "[yellow]--sparse only applies to new clones; the existing checkout is left as is.[/yellow]"
+            )
         return
 
-    console.print(f"Cloning {repo}...")
-    result = _run(
-        ["git", "clone", repo, str(dotfiles_path)],
-        check=False,
-    )
+    console.print(f"Cloning {repo}{' (sparse)' if sparse else ''}...")
+    extra = ["--filter=blob:none", "--no-checkout"] if sparse else []
+    with LiveTails(console, ["git clone"]) as tails:
+        result = stream_run(
+            ["git", "clone", "--progress", *extra, repo, str(dotfiles_path)],
+            on_line=partial(tails.update, "git clone"),
+            log_path=LOG_DIR / "clone.log",
+        )
     if result.returncode != 0:
-        console.print(f"[red]Clone failed:[/red] {result.stderr.strip()}")
+        print_failure(console, "Clone", result, LOG_DIR / "clone.log")
         console.print("[yellow]Make sure you've added your SSH key to GitHub.[/yellow]")
         raise SystemExit(1)
+    if name:
+        Config(dotfiles_path=str(dotfiles_path)).record_machine_name(name)
+    if sparse:
+        _narrow_checkout(console, dotfiles_path)
     console.print(f"[green]Cloned to {dotfiles_path}[/green]")
 
 
+def _narrow_checkout(console: Console, dotfiles_path: Path) -> None:
+    """Check out just the config, then just the files this machine's effective config needs.
+
+    Config files come first, a level of includes at a time, since the rest of
+    the sparse set can only be worked out once they're all present.
+    """
+    cwd = str(dotfiles_path)
+    log_path = LOG_DIR / "checkout.log"
+
+    def check(result: subprocess.CompletedProcess) -> None:
+        if result.returncode != 0:
+            print_failure(console, "Sparse checkout", result, log_path)
+            raise SystemExit(1)
+
+    # Blobs are fetched here rather than by the clone, so this is the slow part.
+    with LiveTails(console, ["git checkout"]) as tails:
+        on_line = partial(tails.update, "git checkout")
+        paths: list[str] = []
+        while (wanted := config_closure(dotfiles_path)) != paths:
+            paths = wanted
+            check(set_sparse(cwd, paths, on_line=on_line, log_path=log_path))
+            check(stream_run(["git", "checkout", "--progress"], cwd=cwd, on_line=on_line, log_path=log_path))
+
+        config = load_config(dotfiles_path / ".dotsync.toml")
+        config.dotfiles_path = str(dotfiles_path)
+        paths = sparse_paths(config)
+        check(set_sparse(cwd, paths, on_line=on_line, log_path=log_path))
+    console.print(f"[dim]Checked out {len(paths)} path(s) for this machine.[/dim]")
+
+
 def _run_brew_bundle(console: Console, dotfiles_path: Path, brewfile: str) -> None:
     """Run brew bundle if on macOS and Brewfile exists."""
     if platform.system() != "Darwin":
@@ -82,21 +137,37 @@ def _run_brew_bundle(console: Console, dotfiles_path: Path, brewfile: str) -> No
         return
 
     console.print("Running brew bundle...")
-    result = _run(
-        ["brew", "bundle", "--file", str(brewfile_path)],
-        check=False,
-    )
+    log_path = LOG_DIR / "brew-bundle.log"
+    # Keep just the failure lines rather than the whole (possibly huge) output.
+    failures: list[str] = []
+
+    def on_line(line: str) -> None:
+        tails.update("brew bundle", line)
+        if "has failed" in line.lower():
+            failures.append(line)
+
+    with LiveTails(console, ["brew bundle"]) as tails:
+        result = stream_run(
+            ["brew", "bundle", "--file", str(brewfile_path)],
+            on_line=on_line,
+            log_path=log_path,
+        )
     if result.returncode != 0:
         console.print("[yellow]Some brew packages failed. Run 'dotsync pending' to retry.[/yellow]")
+        console.print(f"[dim]Full log: {log_path}[/dim]")
         # Capture failed packages
         from dotsync.brewfile import capture_failures
-        capture_failures(result.stderr + result.stdout, dotfiles_path)
+        capture_failures("\n".join(failures), dotfiles_path)
     else:
         console.print("[green]Brew bundle complete.[/green]")
 
 
-def bootstrap() -> None:
-    """Full new-machine bootstrap flow."""
+def bootstrap(sparse: bool = False, name: str | None = None) -> None:
+    """Full new-machine bootstrap flow.
+
+    ``sparse`` clones only the files this machine links or brews from.
+    ``name`` is this machine's fleet name, if it isn't its hostname.
+    """
     console = Console()
     config = load_config()
 
@@ -111,7 +182,10 @@ def bootstrap() -> None:
     # Step 3: Clone dotfiles
     if config.repo:
         dotfiles_path = config.dotfiles_dir
-        _clone_dotfiles(console, config.repo, dotfiles_path)
+        _clone_dotfiles(console, config.repo, dotfiles_path, sparse=sparse, name=name)
+        # Also covers an existing checkout, where the clone was skipped.
+        if name and config.machine_name() != name:
+            config.record_machine_name(name)
     else:
         console.print("[yellow]No repo configured in .dotsync.toml. Skipping clone.[/yellow]")
         console.print("[dim]Set dotsync.repo in your config after cloning manually.[/dim]")
@@ -121,14 +195,15 @@ def bootstrap() -> None:
     console.print("\nLinking dotfiles...")
     link_dotfiles()
 
-    # Step 5: Brew bundle
+    # Step 5: Brew bundle (the config may have come with the clone)
+    config = load_config().effective()
     _run_brew_bundle(console, config.dotfiles_dir, config.brewfile)
 
     # Step 6: Add this machine to config
-    hostname = platform.node().split(".")[0].lower()
-    if not any(m.name == hostname for m in config.machines):
-        if Confirm.ask(f"\nAdd this machine ('{hostname}') to fleet config?", default=True):
+    fleet_name = config.machine_name()
+    if not any(m.name == fleet_name for m in config.machines):
+        if Confirm.ask(f"\nAdd this machine ('{fleet_name}') to fleet config?", default=True):
             from dotsync.config import add_machine
-            add_machine(hostname)
+            add_machine(fleet_name)
 
     console.print("\n[bold green]Setup complete![/bold green]")
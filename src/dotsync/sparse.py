@@ -0,0 +1,102 @@
+"""Sparse, partial checkouts limited to what a machine actually uses."""
+
+from __future__ import annotations
+
+import re
+import shlex
+import subprocess
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+from dotsync.config import Config
+from dotsync.stream import stream_run
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    import tomli as tomllib
+
+# Characters with special meaning in sparse-checkout (gitignore) patterns.
+_GLOB = re.compile(r"([*?\[\]\\!#])")
+
+
+def _escape(path: str) -> str:
+    return _GLOB.sub(r"\\\1", path)
+
+
+def sparse_paths(config: Config, machine: str | None = None) -> list[str]:
+    """Repo-relative paths one machine needs: its link sources, Brewfile and config files."""
+    effective = config.effective(machine)
+    root = config.dotfiles_dir.resolve()
+    paths = {*effective.links, effective.brewfile, ".dotsync.toml"}
+    for source in config.sources:
+        if source.is_relative_to(root):
+            paths.add(source.relative_to(root).as_posix())
+    return sorted({p.strip("/") for p in paths} - {""})
+
+
+def sparse_patterns(paths: list[str]) -> list[str]:
+    """Anchored, escaped non-cone patterns; a directory pattern covers its contents."""
+    return [f"/{_escape(p)}" for p in paths]
+
+
+def config_closure(dotfiles_dir: Path) -> list[str]:
+    """Repo-relative config files reachable from .dotsync.toml through ``include``.
+
+    Files not checked out yet are listed but not followed, so while
+    bootstrapping a sparse clone this grows by one level per checkout.
+    """
+    root = dotfiles_dir.resolve()
+    found: list[str] = []
+    queue = [root / ".dotsync.toml"]
+    while queue:
+        path = queue.pop(0).resolve()
+        if not path.is_relative_to(root):
+            continue
+        rel = path.relative_to(root).as_posix()
+        if rel in found:
+            continue
+        found.append(rel)
+        try:
+            data = tomllib.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        includes = data.get("include", [])
+        if isinstance(includes, list):
+            queue.extend(path.parent / i for i in includes if isinstance(i, str))
+    return found
+
+
+def is_sparse(cwd: str) -> bool:
+    result = subprocess.run(
+        ["git", "config", "--bool", "core.sparseCheckout"],
+        cwd=cwd, capture_output=True, text=True, check=False,
+    )
+    return result.stdout.strip() == "true"
+
+
+def set_sparse(
+    cwd: str,
+    paths: list[str],
+    on_line: Callable[[str], None] | None = None,
+    log_path: Path | None = None,
+) -> subprocess.CompletedProcess:
+    """Replace the checkout's sparse set, adding or removing files to match.
+
+    In a partial clone this is where newly included files are downloaded, so
+    output is streamed to ``on_line`` and ``log_path`` as with ``stream_run``.
+    """
+    return stream_run(
+        ["git", "sparse-checkout", "set", "--no-cone", *sparse_patterns(paths)],
+        cwd=cwd, on_line=on_line, log_path=log_path,
+    )
+
+
+def remote_refresh(paths: list[str]) -> str:
+    """Shell snippet that updates the sparse set, but only on hosts that use one."""
+    patterns = " ".join(shlex.quote(p) for p in sparse_patterns(paths))
+    return (
+        'if [ "$(git config --bool core.sparseCheckout)" = true ]; then '
+        f"git sparse-checkout set --no-cone {patterns} || exit; fi"
+    )
@@ -2,17 +2,61 @@
 
 from __future__ import annotations
 
+import random
 import subprocess
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
 
+from dotsync.stream import TAIL_LINES, stream_run
 
-def run_remote(host: str, command: str, timeout: int = 10) -> subprocess.CompletedProcess:
-    """Run a command on a remote machine via SSH."""
-    return subprocess.run(
-        ["ssh", "-o", f"ConnectTimeout={timeout}", "-o", "BatchMode=yes", host, command],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
+# ssh exits 255 when the connection itself fails (DNS, refused, timeout).
+# Any other exit code is the remote command's own status and is not retried.
+SSH_TRANSPORT_ERROR = 255
+
+# Upper bound on simultaneous SSH sessions when fanning out to the fleet.
+MAX_PARALLEL = 8
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, retry: int) -> float:
+        """Exponential backoff with full jitter for the given retry (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+def run_remote(
+    host: str,
+    command: str,
+    timeout: int = 10,
+    retry: RetryPolicy | None = None,
+    on_line: Callable[[str], None] | None = None,
+    log_path: Path | None = None,
+    tail: int | None = TAIL_LINES,
+) -> subprocess.CompletedProcess:
+    """Run a command on a remote machine via SSH.
+
+    Output is streamed to ``on_line`` and ``log_path`` as it arrives (see
+    ``stream_run``). With a retry policy, transient connection failures
+    (exit 255) are retried with backoff; the last result is returned either way.
+    """
+    attempts = retry.attempts if retry else 1
+    for attempt in range(attempts):
+        result = stream_run(
+            ["ssh", "-o", f"ConnectTimeout={timeout}", "-o", "BatchMode=yes", host, command],
+            on_line=on_line,
+            log_path=log_path,
+            tail=tail,
+        )
+        if result.returncode != SSH_TRANSPORT_ERROR or attempt == attempts - 1:
+            break
+        time.sleep(retry.delay(attempt))
+    return result
 
 
 def is_reachable(host: str, timeout: int = 3) -> bool:
@@ -0,0 +1,144 @@
+"""Stream subprocess output line by line with bounded memory and on-disk logs."""
+
+from __future__ import annotations
+
+import os
+import re
+import selectors
+import subprocess
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+from rich.console import Console
+from rich.live import Live
+from rich.markup import escape
+from rich.table import Table
+
+from dotsync.config import DEFAULT_STATE_DIR
+
+LOG_DIR = DEFAULT_STATE_DIR / "logs"
+TAIL_LINES = 200
+MAX_LINE = 64 * 1024
+
+# git and brew draw progress bars with bare \r, so treat it as a line break too.
+_LINE_BREAK = re.compile(rb"\r\n|\r|\n")
+
+# git's --progress chatter, locally or relayed from the remote, which buries the actual error.
+_PROGRESS = re.compile(
+    r"^(remote: +)?((Enumerating|Counting|Compressing|Writing|Receiving|Resolving|Unpacking) "
+    r"(objects|deltas)|Delta compression|Total \d+)"
+)
+
+
+def stream_run(
+    cmd: list[str],
+    cwd: str | None = None,
+    on_line: Callable[[str], None] | None = None,
+    log_path: Path | None = None,
+    tail: int | None = TAIL_LINES,
+) -> subprocess.CompletedProcess:
+    """Run a command, handing each output line to ``on_line`` as it arrives.
+
+    Only the last ``tail`` lines of stdout and stderr are kept in memory and
+    returned on the result (all of them if ``tail`` is None); the full output
+    goes to ``log_path`` if given.
+    """
+    # No stdin: parallel ssh sessions under a Live display mustn't compete for keystrokes.
+    proc = subprocess.Popen(
+        cmd, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    tails = {proc.stdout: deque(maxlen=tail), proc.stderr: deque(maxlen=tail)}
+    partial = {proc.stdout: b"", proc.stderr: b""}
+
+    def emit(pipe, raw: bytes) -> None:
+        if not raw:
+            return
+        line = raw.decode(errors="replace")
+        tails[pipe].append(line)
+        if on_line:
+            on_line(line)
+
+    log = None
+    if log_path:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        log = open(log_path, "wb")
+
+    try:
+        with selectors.DefaultSelector() as sel:
+            for pipe in tails:
+                sel.register(pipe, selectors.EVENT_READ)
+            while sel.get_map():
+                for key, _ in sel.select():
+                    pipe = key.fileobj
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        sel.unregister(pipe)
+                        emit(pipe, partial[pipe])
+                        continue
+                    if log:
+                        log.write(chunk)
+                    *lines, rest = _LINE_BREAK.split(partial[pipe] + chunk)
+                    if len(rest) > MAX_LINE:
+                        lines.append(rest)
+                        rest = b""
+                    partial[pipe] = rest
+                    for raw in lines:
+                        emit(pipe, raw)
+    finally:
+        if log:
+            log.close()
+        proc.stdout.close()
+        proc.stderr.close()
+        proc.wait()
+
+    return subprocess.CompletedProcess(
+        args=cmd,
+        returncode=proc.returncode,
+        stdout="\n".join(tails[proc.stdout]),
+        stderr="\n".join(tails[proc.stderr]),
+    )
+
+
+def error_lines(output: str, count: int = 4) -> list[str]:
+    """The last ``count`` non-blank lines of ``output`` that aren't git progress."""
+    lines = [line.rstrip() for line in output.splitlines()]
+    return [line for line in lines if line.strip() and not _PROGRESS.match(line)][-count:]
+
+
+def print_failure(console: Console, what: str, result: subprocess.CompletedProcess, log: Path) -> None:
+    """Report a failed git command by its last few lines of stderr, skipping progress output."""
+    console.print(f"[red]{what} failed:[/red]")
+    for line in error_lines(result.stderr):
+        console.print(f"    {escape(line)}")
+    console.print(f"    [dim]full log: {log}[/dim]")
+
+
+class LiveTails:
+    """A Rich Live view of the last few output lines for each named task."""
+
+    def __init__(self, console: Console, names: Iterable[str], lines: int = 3):
+        self.tails: dict[str, deque[str]] = {name: deque(maxlen=lines) for name in names}
+        self._lock = threading.Lock()
+        self.live = Live(self, console=console, refresh_per_second=8, transient=True)
+
+    def update(self, name: str, line: str) -> None:
+        with self._lock:
+            self.tails[name].append(line.rstrip())
+
+    def __rich__(self) -> Table:
+        table = Table.grid(padding=(0, 2))
+        table.add_column(style="cyan", no_wrap=True)
+        table.add_column(style="dim", overflow="ellipsis")
+        with self._lock:
+            for name, tail in self.tails.items():
+                table.add_row(name, "\n".join(tail) or "…")
+        return table
+
+    def __enter__(self) -> LiveTails:
+        self.live.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.live.stop()
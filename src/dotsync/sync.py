@@ -2,12 +2,25 @@
 
 from __future__ import annotations
 
+import shlex
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
 
 from rich.console import Console
+from rich.markup import escape
 from rich.table import Table
 
-from dotsync.config import load_config
+from dotsync.config import PLAN_FILE, Config, Machine, load_config
+from dotsync.health import HealthStore, load_failed_hosts, save_push_result
+from dotsync.history import Event, record_events
+from dotsync.lock import PUSH_LOCK, PUSH_PENDING, FileLock, lock_path, remote_locked, repo_lock
+from dotsync.preflight import PULL, UP_TO_DATE, check_fleet
+from dotsync.sparse import is_sparse, remote_refresh, set_sparse, sparse_paths
+from dotsync.ssh import MAX_PARALLEL, SSH_TRANSPORT_ERROR, RetryPolicy, run_remote
+from dotsync.stream import LOG_DIR, LiveTails, error_lines, print_failure, stream_run
 
 
 def _run(cmd: list[str], cwd: str | None = None, check: bool = True) -> subprocess.CompletedProcess:
@@ -53,6 +66,13 @@ def _auto_commit(cwd: str) -> bool:
     return True
 
 
+def _timed(fn, *args, **kwargs) -> tuple[subprocess.CompletedProcess, float]:
+    """Call ``fn`` and return its result with the wall-clock seconds it took."""
+    start = time.monotonic()
+    result = fn(*args, **kwargs)
+    return result, time.monotonic() - start
+
+
 def fleet_status() -> None:
     """Show fleet dashboard with status of all machines."""
     console = Console()
@@ -68,68 +88,239 @@ def fleet_status() -> None:
     table.add_column("Reachable", justify="center")
     table.add_column("Git Status", style="yellow")
 
+    health = HealthStore()
+    retry = RetryPolicy()
+    events: list[Event] = []
+
     for machine in config.machines:
-        # Check if machine is reachable via SSH
-        result = _run(
-            ["ssh", "-o", "ConnectTimeout=3", "-o", "BatchMode=yes",
-             machine.ssh_alias, "echo ok"],
-            check=False,
+        if health.should_skip(machine.name):
+            table.add_row(machine.name, machine.ssh_alias, "[dim]skipped[/dim]", "cooling down")
+            continue
+
+        # Reachability and git status in one round trip
+        result, elapsed = _timed(
+            run_remote,
+            machine.ssh_alias,
+            f"cd {config.dotfiles_path} && git status --porcelain 2>/dev/null | wc -l",
+            timeout=3,
+            retry=retry,
         )
-        reachable = "[green]yes[/green]" if result.returncode == 0 else "[red]no[/red]"
+        reachable = result.returncode != SSH_TRANSPORT_ERROR
+        health.record(machine.name, reachable)
 
-        # Try to get git status on remote
         git_status = "—"
+        changed = None
         if result.returncode == 0:
-            gs = _run(
-                ["ssh", "-o", "ConnectTimeout=3", machine.ssh_alias,
-                 f"cd {config.dotfiles_path} && git status --porcelain 2>/dev/null | wc -l"],
-                check=False,
-            )
-            if gs.returncode == 0:
-                count = gs.stdout.strip()
-                git_status = "clean" if count == "0" else f"{count} changed"
-
-        table.add_row(machine.name, machine.ssh_alias, reachable, git_status)
+            count = result.stdout.strip()
+            git_status = "clean" if count == "0" else f"{count} changed"
+            changed = int(count) if count.isdigit() else None
+        events.append(Event(machine.name, "status", reachable, elapsed, changed))
+
+        table.add_row(
+            machine.name,
+            machine.ssh_alias,
+            "[green]yes[/green]" if reachable else "[red]no[/red]",
+            git_status,
+        )
 
+    health.save()
+    record_events(events)
     console.print(table)
 
 
-def push_dotfiles() -> None:
-    """Auto-commit local changes, push to remote, then cascade pull to fleet."""
+def _pull_command(config: Config, machine: Machine) -> str:
+    """Remote command that records the machine's plan and fast-forwards under the repo lock.
+
+    Hosts bootstrapped with a sparse checkout get their sparse set updated to
+    the plan first, so newly linked files arrive with the pull.
+    """
+    plan = shlex.quote(config.plan_record(machine))
+    update = f"{remote_refresh(sparse_paths(config, machine.name))} && git pull --ff-only"
+    return (
+        f"cd {config.dotfiles_path} && printf '%s\\n' {plan} > .git/{PLAN_FILE} && "
+        f"{remote_locked(f'sh -c {shlex.quote(update)}')} 2>&1"
+    )
+
+
+def _cascade(
+    console: Console,
+    config: Config,
+    machines: list[Machine],
+    head: str,
+    force: bool = False,
+) -> None:
+    """Bring each machine up to ``head`` over SSH, in parallel.
+
+    A pre-flight probe first sorts out hosts that are already current or that
+    can't fast-forward (diverged, or local edits in the way), so only the rest
+    are asked to pull. Hosts that are cooling down after repeated failures are
+    skipped unless ``force`` is set. Pull output is shown live and saved in full under LOG_DIR.
+
+    Each pulled host is also sent its fleet name and effective plan (links and
+    Brewfile after overrides), precomputed here and written to
+    .git/dotsync-plan.json, where ``Config.effective`` picks them up.
+    """
+    health = HealthStore()
+    retry = RetryPolicy()
+
+    active = [m for m in machines if force or not health.should_skip(m.name)]
+    checks = {c.machine.name: c for c in check_fleet(config, active, head, retry=retry)}
+    to_pull = [c.machine for c in checks.values() if c.action == PULL]
+
+    with LiveTails(console, [m.name for m in to_pull]) as tails, \
+            ThreadPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+        futures = {
+            m.name: pool.submit(
+                _timed,
+                run_remote,
+                m.ssh_alias,
+                _pull_command(config, m),
+                timeout=5,
+                retry=retry,
+                on_line=partial(tails.update, m.name),
+                log_path=LOG_DIR / f"{m.name}-pull.log",
+            )
+            for m in to_pull
+        }
+
+    ok: list[str] = []
+    failed: list[str] = []
+    cooling: list[str] = []
+    events: list[Event] = []
+    for machine in machines:
+        console.print(f"  {machine.name}...", end=" ")
+        check = checks.get(machine.name)
+        if check is None:
+            until = time.strftime("%H:%M:%S", time.localtime(health.cooldown_ends(machine.name)))
+            console.print(f"[dim]skipped[/dim] — failing repeatedly, cooling down until {until}")
+            failed.append(machine.name)
+            cooling.append(machine.name)
+            continue
+
+        if check.action != PULL:
+            health.record(machine.name, check.reachable)
+            if check.action == UP_TO_DATE:
+                console.print("[green]up to date[/green]")
+                ok.append(machine.name)
+            else:
+                console.print(f"[yellow]blocked[/yellow] — {check.reason}")
+                events.append(Event(machine.name, "push", False))
+                failed.append(machine.name)
+            continue
+
+        r, elapsed = futures[machine.name].result()
+        health.record(machine.name, r.returncode != SSH_TRANSPORT_ERROR)
+        events.append(Event(machine.name, "push", r.returncode == 0, elapsed))
+        if r.returncode == 0:
+            console.print("[green]ok[/green]")
+            ok.append(machine.name)
+        else:
+            last = error_lines(r.stderr, 1) or error_lines(r.stdout, 1)
+            console.print(f"[red]failed[/red] — {escape(' '.join(last))}")
+            console.print(f"    [dim]full log: {LOG_DIR / f'{machine.name}-pull.log'}[/dim]")
+            failed.append(machine.name)
+
+    health.save()
+    save_push_result(ok, failed)
+    record_events(events)
+    if len(failed) > len(cooling):
+        console.print(
+            f"\n[yellow]{len(failed) - len(cooling)} machine(s) failed. "
+            "Run 'dotsync push --retry-failed' to retry just those.[/yellow]"
+        )
+    if cooling:
+        console.print(
+            f"[dim]{len(cooling)} machine(s) skipped while cooling down; "
+            "'dotsync push --retry-failed' retries them right away.[/dim]"
+        )
+
+
+def _commit_and_push(console: Console, cwd: str) -> str | None:
+    """Auto-commit and push under the repo lock. Returns the pushed HEAD, or None on failure."""
+    with repo_lock(Path(cwd)):
+        if _auto_commit(cwd):
+            console.print("[green]Committed local changes.[/green]")
+        else:
+            console.print("[dim]No local changes to commit.[/dim]")
+
+        console.print("Pushing to remote...")
+        with LiveTails(console, ["git push"]) as tails:
+            result = stream_run(
+                ["git", "push", "--progress"],
+                cwd=cwd,
+                on_line=partial(tails.update, "git push"),
+                log_path=LOG_DIR / "push.log",
+            )
+        if result.returncode != 0:
+            print_failure(console, "Push", result, LOG_DIR / "push.log")
+            return None
+        console.print("[green]Pushed.[/green]")
+        return _run(["git", "rev-parse", "HEAD"], cwd=cwd, check=False).stdout.strip()
+
+
+def push_dotfiles(retry_failed: bool = False) -> None:
+    """Auto-commit local changes, push to remote, then cascade pull to fleet.
+
+    A push started while another is in flight doesn't run its own cascade: it
+    leaves a marker and the running push does one follow-up round for all of
+    them. With ``retry_failed``, skip the commit and push and re-cascade only
+    to the machines that failed in the previous run, including any that are
+    cooling down.
+    """
     console = Console()
     config = load_config()
     cwd = str(config.dotfiles_dir)
 
-    # Auto-commit
-    if _auto_commit(cwd):
-        console.print("[green]Committed local changes.[/green]")
-    else:
-        console.print("[dim]No local changes to commit.[/dim]")
-
-    # Push to remote
-    console.print("Pushing to remote...")
-    result = _run(["git", "push"], cwd=cwd, check=False)
-    if result.returncode != 0:
-        console.print(f"[red]Push failed:[/red] {result.stderr.strip()}")
-        return
-    console.print("[green]Pushed.[/green]")
-
-    # Cascade to fleet
-    if not config.machines:
+    if retry_failed:
+        failed = set(load_failed_hosts())
+        machines = [m for m in config.machines if m.name in failed]
+        if not machines:
+            console.print("[green]No failed machines from the last push.[/green]")
+            return
+        upstream = _run(["git", "rev-parse", "@{upstream}"], cwd=cwd, check=False)
+        if upstream.returncode != 0:
+            console.print(f"[red]Can't resolve upstream branch:[/red] {upstream.stderr.strip()}")
+            return
+        console.print("Retrying failed machines...")
+        # An explicit retry goes past the circuit breaker for the hosts it targets.
+        _cascade(console, config, machines, upstream.stdout.strip(), force=True)
         return
 
-    console.print("\nCascading to fleet...")
-    for machine in config.machines:
-        console.print(f"  {machine.name}...", end=" ")
-        r = _run(
-            ["ssh", "-o", "ConnectTimeout=5", machine.ssh_alias,
-             f"cd {config.dotfiles_path} && git pull --ff-only 2>&1"],
-            check=False,
-        )
-        if r.returncode == 0:
-            console.print("[green]ok[/green]")
-        else:
-            console.print(f"[red]failed[/red] — {r.stderr.strip() or r.stdout.strip()}")
+    # The pending marker is only read or written under the repo lock, so a
+    # follow-up request can't slip in between the final check and release.
+    repo = repo_lock(config.dotfiles_dir)
+    in_flight = FileLock(lock_path(config.dotfiles_dir, PUSH_LOCK))
+    pending = lock_path(config.dotfiles_dir, PUSH_PENDING)
+
+    with repo:
+        if not in_flight.acquire(blocking=False):
+            pending.touch()
+            console.print(
+                "[yellow]Another push is in progress; "
+                "it will commit and cascade these changes when it finishes.[/yellow]"
+            )
+            return
+
+    try:
+        cascaded = None
+        while True:
+            head = _commit_and_push(console, cwd)
+            if head is None:
+                break
+
+            if config.machines and head != cascaded:
+                console.print("\nCascading to fleet...")
+                _cascade(console, config, config.machines, head)
+                cascaded = head
+
+            with repo:
+                if not pending.exists():
+                    in_flight.release()
+                    break
+                pending.unlink()
+            console.print("\n[bold]Another push arrived meanwhile; running a follow-up.[/bold]")
+    finally:
+        in_flight.release()
 
 
 def pull_dotfiles() -> None:
@@ -139,9 +330,19 @@ def pull_dotfiles() -> None:
     cwd = str(config.dotfiles_dir)
 
     console.print("Pulling latest changes...")
-    result = _run(["git", "pull", "--ff-only"], cwd=cwd, check=False)
+    with repo_lock(config.dotfiles_dir):
+        with LiveTails(console, ["git pull"]) as tails:
+            result = stream_run(
+                ["git", "pull", "--ff-only", "--progress"],
+                cwd=cwd,
+                on_line=partial(tails.update, "git pull"),
+                log_path=LOG_DIR / "pull.log",
+            )
+        if result.returncode == 0 and is_sparse(cwd):
+            # The pull may have brought new links or includes; widen (or narrow) to match.
+            set_sparse(cwd, sparse_paths(load_config()))
     if result.returncode != 0:
-        console.print(f"[red]Pull failed:[/red] {result.stderr.strip()}")
+        print_failure(console, "Pull", result, LOG_DIR / "pull.log")
         return
 
-    console.print(f"[green]{result.stdout.strip()}[/green]")
+    console.print(f"[green]{escape(result.stdout.strip())}[/green]")
@@ -1,5 +1,7 @@
 """Common test fixtures for dotsync."""
 
+import subprocess
+
 import pytest
 
 from dotsync.config import Config, Machine
@@ -27,3 +29,25 @@ def empty_config(tmp_path):
     dotfiles = tmp_path / "dotfiles"
     dotfiles.mkdir()
     return Config(dotfiles_path=str(dotfiles))
+
+
+@pytest.fixture
+def git():
+    """Run git in a directory with a throwaway identity; returns stripped stdout."""
+
+    def run(cwd, *args):
+        return subprocess.run(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            cwd=cwd, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+
+    return run
+
+
+@pytest.fixture(autouse=True)
+def isolated_config_cache(tmp_path, monkeypatch):
+    """Keep config parse/validation caches out of the real state dir and between tests."""
+    from dotsync import config
+
+    monkeypatch.setattr(config, "VALIDATED_CONFIGS_PATH", tmp_path / "validated-configs")
+    monkeypatch.setattr(config, "_parsed", {})
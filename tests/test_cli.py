@@ -59,3 +59,20 @@ def test_pending_help():
     result = runner.invoke(cli, ["pending", "--help"])
     assert result.exit_code == 0
     assert "brew" in result.output.lower()
+
+
+def test_push_retry_failed_flag():
+    result = runner.invoke(cli, ["push", "--help"])
+    assert "--retry-failed" in result.output
+
+
+def test_history_help():
+    result = runner.invoke(cli, ["history", "--help"])
+    assert result.exit_code == 0
+    assert "--since" in result.output
+
+
+def test_history_rejects_bad_since():
+    result = runner.invoke(cli, ["history", "--since", "3x"])
+    assert result.exit_code == 2
+    assert "invalid duration '3x'" in result.output
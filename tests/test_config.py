@@ -1,6 +1,12 @@
 """Test config loading and saving."""
 
-from dotsync.config import Config, Machine, load_config, save_config
+from unittest.mock import patch
+
+import pytest
+
+from dotsync import config
+from dotsync.config import Config, ConfigError, Machine, load_config, save_config
+from dotsync.schema import validate
 
 
 def test_save_and_load_roundtrip(tmp_path):
@@ -41,3 +47,186 @@ def test_add_machine_duplicate(tmp_path, capsys):
     # Loading from default path won't work in tests, so we test the logic directly
     loaded = load_config(path=config_path)
     assert any(m.name == "box1" for m in loaded.machines)
+
+
+def _write(tmp_path, text):
+    config_path = tmp_path / ".dotsync.toml"
+    config_path.write_text(text)
+    return config_path
+
+
+def test_invalid_config_reports_every_problem_with_lines(tmp_path):
+    config_path = _write(tmp_path, """\
+[dotsync]
+repo = "git@github.com:user/dots.git"
+colour = "blue"
+
+[links]
+".zshrc" = 3
+
+[[machines]]
+name = "box"
+
+[[machines]]
+ssh_alias = "other"
+
+[[machines]]
+name = "box"
+""")
+
+    with pytest.raises(ConfigError) as exc:
+        load_config(path=config_path)
+
+    message = str(exc.value)
+    assert f"{config_path}:3: dotsync.colour: unknown key 'colour'" in message
+    assert f'{config_path}:6: links.".zshrc": expected a string, got int' in message
+    assert f"{config_path}:11: machines[1]: missing required key 'name'" in message
+    assert f"{config_path}:15: machines[2].name: duplicate name 'box'" in message
+
+
+def test_toml_syntax_error_is_config_error(tmp_path):
+    with pytest.raises(ConfigError):
+        load_config(path=_write(tmp_path, "[dotsync\n"))
+
+
+def test_unchanged_config_is_validated_once(tmp_path):
+    config_path = _write(tmp_path, '[[machines]]\nname = "box"\n')
+
+    with patch("dotsync.config.validate", wraps=validate) as spy:
+        load_config(path=config_path)
+        load_config(path=config_path)
+    assert spy.call_count == 1
+
+    # A fresh process re-parses but skips the schema walk for known-good contents.
+    config._parsed.clear()
+    with patch("dotsync.schema._SCHEMA") as schema:
+        load_config(path=config_path)
+    schema.assert_not_called()
+
+
+def test_includes_and_machine_overrides(tmp_path):
+    (tmp_path / "hosts").mkdir()
+    (tmp_path / "hosts" / "servers.toml").write_text("""\
+[links]
+".bashrc" = ".bashrc"
+
+[[machines]]
+name = "server"
+brewfile = "Brewfile.server"
+skip_links = [".gitconfig"]
+
+[machines.links]
+"ssh/server_config" = ".ssh/config"
+""")
+    config_path = _write(tmp_path, """\
+include = ["hosts/servers.toml"]
+
+[links]
+".zshrc" = ".zshrc"
+".gitconfig" = ".gitconfig"
+
+[[machines]]
+name = "laptop"
+""")
+
+    loaded = load_config(path=config_path)
+    assert [m.name for m in loaded.machines] == ["server", "laptop"]
+    assert loaded.links == {".bashrc": ".bashrc", ".zshrc": ".zshrc", ".gitconfig": ".gitconfig"}
+
+    server = loaded.effective("server")
+    assert server.brewfile == "Brewfile.server"
+    assert server.links == {
+        ".bashrc": ".bashrc",
+        ".zshrc": ".zshrc",
+        "ssh/server_config": ".ssh/config",
+    }
+    assert loaded.effective("laptop").links == loaded.links
+
+
+def test_identical_overrides_share_a_plan():
+    cfg = Config(
+        links={".zshrc": ".zshrc"},
+        machines=[Machine("a", "a", brewfile="B"), Machine("b", "b", brewfile="B")],
+    )
+    assert cfg.plan_for(cfg.machines[0]) is cfg.plan_for(cfg.machines[1])
+
+
+def test_include_cycle_is_config_error(tmp_path):
+    (tmp_path / "other.toml").write_text('include = [".dotsync.toml"]\n')
+    config_path = _write(tmp_path, 'include = ["other.toml"]\n')
+    with pytest.raises(ConfigError, match="include cycle"):
+        load_config(path=config_path)
+
+
+def test_duplicate_machine_across_includes(tmp_path):
+    (tmp_path / "other.toml").write_text('[[machines]]\nname = "box"\n')
+    config_path = _write(tmp_path, 'include = ["other.toml"]\n[[machines]]\nname = "box"\n')
+    with pytest.raises(ConfigError, match="defined in both"):
+        load_config(path=config_path)
+
+
+def test_add_machine_keeps_included_settings_out_of_main_file(tmp_path):
+    (tmp_path / "other.toml").write_text('[links]\n".vimrc" = ".vimrc"\n[[machines]]\nname = "box"\n')
+    config_path = _write(
+        tmp_path, f'include = ["other.toml"]\n[dotsync]\ndotfiles_path = "{tmp_path}"\n',
+    )
+
+    with patch("dotsync.config.DEFAULT_CONFIG_PATH", config_path):
+        config.add_machine("new")
+
+    text = config_path.read_text()
+    assert ".vimrc" not in text
+    assert 'name = "box"' not in text
+    assert [m.name for m in load_config(path=config_path).machines] == ["box", "new"]
+
+
+def test_include_expands_home(tmp_path):
+    home = tmp_path / "home"
+    home.mkdir()
+    (home / "inc.toml").write_text('[links]\n".vimrc" = ".vimrc"\n')
+    config_path = _write(tmp_path, 'include = ["~/inc.toml"]\n')
+    with patch.dict("os.environ", {"HOME": str(home)}):
+        assert load_config(path=config_path).links == {".vimrc": ".vimrc"}
+
+
+def _fleet_config(tmp_path):
+    (tmp_path / ".git").mkdir()
+    config_path = _write(tmp_path, f"""\
+[dotsync]
+dotfiles_path = "{tmp_path}"
+
+[links]
+".zshrc" = ".zshrc"
+
+[[machines]]
+name = "build-box"
+ssh_alias = "build"
+brewfile = "Brewfile.server"
+""")
+    return load_config(path=config_path)
+
+
+def test_effective_uses_recorded_fleet_name(tmp_path):
+    loaded = _fleet_config(tmp_path)
+    loaded.record_machine_name("build-box")
+
+    with patch("dotsync.config.local_machine_name", return_value="ip-10-0-0-7"):
+        assert loaded.machine_name() == "build-box"
+        assert loaded.effective().brewfile == "Brewfile.server"
+
+
+def test_effective_uses_cascaded_plan_when_config_unchanged(tmp_path):
+    loaded = _fleet_config(tmp_path)
+    record = loaded.plan_record(loaded.machines[0])
+    loaded.plan_path.write_text(record)
+
+    with patch.object(Config, "plan_for", side_effect=AssertionError("re-resolved")):
+        assert loaded.effective().brewfile == "Brewfile.server"
+
+    # Once the config changes locally, the plan is recomputed under the recorded name.
+    (tmp_path / ".dotsync.toml").write_text(
+        (tmp_path / ".dotsync.toml").read_text().replace("Brewfile.server", "Brewfile.new")
+    )
+    reloaded = load_config(path=tmp_path / ".dotsync.toml")
+    with patch("dotsync.config.local_machine_name", return_value="ip-10-0-0-7"):
+        assert reloaded.effective().brewfile == "Brewfile.new"
@@ -0,0 +1,52 @@
+"""Test host health tracking and last push results."""
+
+from unittest.mock import patch
+
+from dotsync.health import (
+    COOLDOWN_SECONDS,
+    HealthStore,
+    load_failed_hosts,
+    save_push_result,
+)
+
+
+def test_host_trips_after_repeated_failures(tmp_path):
+    store = HealthStore(tmp_path / "health.json")
+    store.record("box", ok=False)
+    assert not store.should_skip("box")
+    store.record("box", ok=False)
+    assert store.should_skip("box")
+
+
+def test_success_resets_health(tmp_path):
+    store = HealthStore(tmp_path / "health.json")
+    store.record("box", ok=False)
+    store.record("box", ok=False)
+    store.record("box", ok=True)
+    assert not store.should_skip("box")
+
+
+def test_cooldown_expires(tmp_path):
+    path = tmp_path / "health.json"
+    store = HealthStore(path)
+    store.record("box", ok=False)
+    store.record("box", ok=False)
+    store.save()
+
+    reloaded = HealthStore(path)
+    later = reloaded.hosts["box"].last_failure + COOLDOWN_SECONDS + 1
+    with patch("dotsync.health.time.time", return_value=later):
+        assert not reloaded.should_skip("box")
+
+
+def test_malformed_health_file_is_ignored(tmp_path):
+    path = tmp_path / "health.json"
+    for content in ("not json", "[]", '{"box": 1}'):
+        path.write_text(content)
+        assert HealthStore(path).hosts == {}
+
+
+def test_push_result_roundtrip(tmp_path):
+    assert load_failed_hosts(tmp_path) == []
+    save_push_result(["work-mini"], ["home-mini"], tmp_path)
+    assert load_failed_hosts(tmp_path) == ["home-mini"]
@@ -0,0 +1,57 @@
+"""Test the fleet history store."""
+
+import pytest
+
+from dotsync.history import Event, parse_since, record_events, summarize
+
+
+def test_summarize_percentiles_and_counts(tmp_path):
+    db = tmp_path / "history.db"
+    record_events(
+        [Event("box", "push", True, float(d)) for d in range(1, 21)]
+        + [Event("box", "push", False, 99.0)]
+        + [Event("box", "status", True, 0.1, 0), Event("box", "status", True, 0.1, 3)]
+        + [Event("other", "status", False, 3.0)],
+        path=db,
+    )
+
+    by_name = {s.machine: s for s in summarize(3600, path=db)}
+    box = by_name["box"]
+    assert box.pushes == 21
+    assert box.push_failures == 1
+    assert box.p50 == 10.0
+    assert box.p95 == 19.0
+    assert box.probes == 2
+    assert box.dirty == 1
+    assert by_name["other"].unreachable == 1
+
+
+def test_summarize_filters_machine(tmp_path):
+    db = tmp_path / "history.db"
+    record_events([Event("a", "push", True, 1.0), Event("b", "push", True, 2.0)], path=db)
+    assert [s.machine for s in summarize(3600, machine="b", path=db)] == ["b"]
+
+
+def test_summarize_missing_db(tmp_path):
+    assert summarize(3600, path=tmp_path / "none.db") == []
+
+
+def test_parse_since():
+    assert parse_since("7d") == 7 * 86400
+    assert parse_since("30m") == 1800
+    with pytest.raises(ValueError):
+        parse_since("soon")
+
+
+def test_percentiles_with_odd_sample_count(tmp_path):
+    db = tmp_path / "history.db"
+    record_events([Event("box", "push", True, float(d)) for d in range(1, 10)], path=db)
+    (box,) = summarize(3600, path=db)
+    assert box.p50 == 5.0
+    assert box.p95 == 9.0
+
+
+def test_summarize_unknown_machine(tmp_path):
+    db = tmp_path / "history.db"
+    record_events([Event("a", "push", True, 1.0)], path=db)
+    assert summarize(3600, machine="nosuch", path=db) == []
@@ -0,0 +1,63 @@
+"""Test repo locking and coalescing of overlapping pushes."""
+
+from unittest.mock import patch
+
+from dotsync import sync
+from dotsync.lock import PUSH_PENDING, FileLock, lock_path, repo_lock
+
+
+def test_lock_is_exclusive(tmp_path):
+    first = FileLock(tmp_path / "x.lock")
+    second = FileLock(tmp_path / "x.lock")
+
+    assert first.acquire(blocking=False)
+    assert not second.acquire(blocking=False)
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
+
+
+def test_lock_lives_in_git_dir(tmp_path):
+    (tmp_path / ".git").mkdir()
+    assert repo_lock(tmp_path).path.parent == tmp_path / ".git"
+
+
+def test_overlapping_push_coalesces_into_one_followup(sample_config):
+    (sample_config.dotfiles_dir / ".git").mkdir()
+    heads = ["aaa", "bbb"]
+
+    def commit_and_push(console, cwd):
+        if len(heads) == 2:
+            # Two more pushes arrive while the first one is running.
+            sync.push_dotfiles()
+            sync.push_dotfiles()
+        return heads.pop(0)
+
+    with patch("dotsync.sync.load_config", return_value=sample_config), \
+         patch("dotsync.sync._commit_and_push", side_effect=commit_and_push) as push, \
+         patch("dotsync.sync._cascade") as cascade:
+        sync.push_dotfiles()
+
+    assert push.call_count == 2
+    assert cascade.call_count == 2
+    assert not lock_path(sample_config.dotfiles_dir, PUSH_PENDING).exists()
+
+
+def test_followup_skips_cascade_when_head_unchanged(sample_config):
+    (sample_config.dotfiles_dir / ".git").mkdir()
+    pending = lock_path(sample_config.dotfiles_dir, PUSH_PENDING)
+    calls = []
+
+    def commit_and_push(console, cwd):
+        if not calls:
+            pending.touch()
+        calls.append(cwd)
+        return "aaa"
+
+    with patch("dotsync.sync.load_config", return_value=sample_config), \
+         patch("dotsync.sync._commit_and_push", side_effect=commit_and_push), \
+         patch("dotsync.sync._cascade") as cascade:
+        sync.push_dotfiles()
+
+    assert len(calls) == 2
+    assert cascade.call_count == 1
@@ -0,0 +1,79 @@
+"""Test pre-cascade fast-forward checks against real git repos."""
+
+import subprocess
+from unittest.mock import patch
+
+from dotsync.config import Config, Machine
+from dotsync.preflight import BLOCKED, PULL, UP_TO_DATE, check_fleet
+
+
+def test_check_fleet_classifies_hosts(tmp_path, git):
+    local = tmp_path / "local"
+    local.mkdir()
+    git(local, "init", "-q")
+    (local / ".zshrc").write_text("v1\n")
+    (local / ".vimrc").write_text("v1\n")
+    (local / "café.txt").write_text("v1\n")
+    (local / "my notes.md").write_text("v1\n")
+    git(local, "add", "-A")
+    git(local, "commit", "-qm", "one")
+
+    hosts = {}
+    for name in [
+        "behind", "current", "edited", "diverged", "untouched", "untracked",
+        "accented", "spaced", "renamed",
+    ]:
+        hosts[name] = tmp_path / name
+        git(tmp_path, "clone", "-q", str(local), name)
+
+    (local / ".zshrc").write_text("v2\n")
+    (local / "nvim").mkdir()
+    (local / "nvim" / "init.lua").write_text("v2\n")
+    (local / "café.txt").write_text("v2\n")
+    (local / "my notes.md").write_text("v2\n")
+    git(local, "add", "-A")
+    git(local, "commit", "-qm", "two")
+    head = git(local, "rev-parse", "HEAD")
+    git(hosts["current"], "pull", "-q", "--ff-only")
+    (hosts["edited"] / ".zshrc").write_text("mine\n")
+    (hosts["untouched"] / ".vimrc").write_text("mine\n")
+    (hosts["diverged"] / ".vimrc").write_text("mine\n")
+    git(hosts["diverged"], "commit", "-qam", "local work")
+    # An untracked directory shows as "?? nvim/" unless listed file by file.
+    (hosts["untracked"] / "nvim").mkdir()
+    (hosts["untracked"] / "nvim" / "init.lua").write_text("mine\n")
+    # Porcelain quotes and octal-escapes these names unless run with -z.
+    (hosts["accented"] / "café.txt").write_text("mine\n")
+    (hosts["spaced"] / "my notes.md").write_text("mine\n")
+    # A staged rename onto a path the pull would create.
+    (hosts["renamed"] / "nvim").mkdir()
+    git(hosts["renamed"], "mv", ".vimrc", "nvim/init.lua")
+
+    config = Config(
+        dotfiles_path="/remote/dotfiles",
+        machines=[Machine(name, name) for name in hosts],
+    )
+
+    def fake_remote(alias, command, **kwargs):
+        command = command.replace(config.dotfiles_path, str(hosts[alias]))
+        return subprocess.run(["sh", "-c", command], capture_output=True, text=True)
+
+    with patch.object(Config, "dotfiles_dir", local), \
+         patch("dotsync.preflight.run_remote", side_effect=fake_remote):
+        checks = {c.machine.name: c for c in check_fleet(config, config.machines, head)}
+
+    assert checks["behind"].action == PULL
+    assert checks["current"].action == UP_TO_DATE
+    assert checks["edited"].action == BLOCKED
+    assert ".zshrc" in checks["edited"].reason
+    assert checks["diverged"].action == BLOCKED
+    assert "diverged" in checks["diverged"].reason
+    assert checks["untouched"].action == PULL
+    assert checks["untracked"].action == BLOCKED
+    assert "nvim/init.lua" in checks["untracked"].reason
+    assert checks["accented"].action == BLOCKED
+    assert "café.txt" in checks["accented"].reason
+    assert checks["spaced"].action == BLOCKED
+    assert "my notes.md" in checks["spaced"].reason
+    assert checks["renamed"].action == BLOCKED
+    assert "nvim/init.lua" in checks["renamed"].reason
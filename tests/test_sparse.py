@@ -0,0 +1,62 @@
+"""Test sparse bootstrap and keeping the sparse set in sync on pull."""
+
+import subprocess
+from unittest.mock import patch
+
+from rich.console import Console
+
+from dotsync.config import Config, Machine, load_config
+from dotsync.setup_machine import _clone_dotfiles
+from dotsync.sparse import sparse_paths, sparse_patterns
+from dotsync.sync import _pull_command
+
+
+def test_sparse_paths_follow_effective_config():
+    config = Config(
+        links={".zshrc": ".zshrc", "nvim": ".config/nvim"},
+        machines=[Machine("server", "server", skip_links=["nvim"], brewfile="brew/Server")],
+    )
+    assert sparse_paths(config, "server") == [".dotsync.toml", ".zshrc", "brew/Server"]
+    assert sparse_patterns(["a*b", "dir"]) == ["/a\\*b", "/dir"]
+
+
+def test_sparse_clone_and_cascade_pull(tmp_path, git):
+    origin = tmp_path / "origin"
+    origin.mkdir()
+    git(origin, "init", "-q")
+    git(origin, "config", "uploadpack.allowFilter", "true")
+    (origin / "hosts.toml").write_text('[links]\n".bashrc" = ".bashrc"\n')
+    (origin / ".dotsync.toml").write_text('include = ["hosts.toml"]\n[links]\n".zshrc" = ".zshrc"\n')
+    for name in [".zshrc", ".bashrc", ".vimrc", "Brewfile"]:
+        (origin / name).write_text(name)
+    git(origin, "add", "-A")
+    git(origin, "commit", "-qm", "one")
+
+    clone = tmp_path / "clone"
+    with patch("dotsync.setup_machine.LOG_DIR", tmp_path / "logs"), \
+         patch("dotsync.config.local_machine_name", return_value="here"):
+        _clone_dotfiles(Console(quiet=True), f"file://{origin}", clone, sparse=True)
+
+    assert sorted(p.name for p in clone.iterdir() if p.name != ".git") == [
+        ".bashrc", ".dotsync.toml", ".zshrc", "Brewfile", "hosts.toml",
+    ]
+    assert (tmp_path / "logs" / "checkout.log").exists()
+
+    # A new link is pushed; the cascade command widens the sparse set and pulls.
+    (origin / ".dotsync.toml").write_text(
+        'include = ["hosts.toml"]\n[links]\n".zshrc" = ".zshrc"\n".vimrc" = ".vimrc"\n'
+    )
+    git(origin, "commit", "-qam", "two")
+    config = load_config(origin / ".dotsync.toml")
+    config.dotfiles_path = str(origin)
+    command = _pull_command(config, Machine("here", "here")).replace(str(origin), str(clone), 1)
+
+    subprocess.run(["sh", "-c", command], check=True, capture_output=True)
+    assert (clone / ".vimrc").exists()
+    assert (clone / ".git" / "dotsync-plan.json").exists()
+
+
+def test_sparse_ignored_for_existing_checkout(tmp_path):
+    console = Console(record=True, width=200)
+    _clone_dotfiles(console, "file:///nowhere", tmp_path, sparse=True)
+    assert "--sparse only applies to new clones" in console.export_text()
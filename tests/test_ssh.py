@@ -0,0 +1,44 @@
+"""Test remote command retry behaviour."""
+
+import subprocess
+from unittest.mock import patch
+
+from dotsync.ssh import RetryPolicy, run_remote
+
+
+def _result(code: int) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=[], returncode=code, stdout="", stderr="")
+
+
+def test_retries_transient_ssh_failure():
+    results = [_result(255), _result(255), _result(0)]
+    with patch("dotsync.ssh.stream_run", side_effect=results) as run, \
+         patch("dotsync.ssh.time.sleep") as sleep:
+        result = run_remote("box", "true", retry=RetryPolicy(attempts=3))
+
+    assert result.returncode == 0
+    assert run.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_does_not_retry_remote_command_failure():
+    with patch("dotsync.ssh.stream_run", return_value=_result(1)) as run, \
+         patch("dotsync.ssh.time.sleep"):
+        result = run_remote("box", "false", retry=RetryPolicy(attempts=3))
+
+    assert result.returncode == 1
+    assert run.call_count == 1
+
+
+def test_gives_up_after_attempts():
+    with patch("dotsync.ssh.stream_run", return_value=_result(255)) as run, \
+         patch("dotsync.ssh.time.sleep"):
+        result = run_remote("box", "true", retry=RetryPolicy(attempts=2))
+
+    assert result.returncode == 255
+    assert run.call_count == 2
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.delay(n) <= 4.0 for n in range(10))
@@ -0,0 +1,46 @@
+"""Test streaming subprocess output."""
+
+import sys
+
+from dotsync.stream import error_lines, stream_run
+
+SCRIPT = """
+import sys
+for i in range(50):
+    print(f"out {i}")
+sys.stderr.write("10%\\r50%\\r100%\\n")
+sys.exit(3)
+"""
+
+
+def test_stream_run_tails_and_logs(tmp_path):
+    lines = []
+    log = tmp_path / "logs" / "run.log"
+
+    result = stream_run(
+        [sys.executable, "-c", SCRIPT], on_line=lines.append, log_path=log, tail=5,
+    )
+
+    assert result.returncode == 3
+    assert result.stdout.splitlines() == [f"out {i}" for i in range(45, 50)]
+    assert result.stderr.splitlines() == ["10%", "50%", "100%"]
+    assert len(lines) == 53
+    assert log.read_text().count("out ") == 50
+
+
+def test_stream_run_detaches_stdin():
+    result = stream_run([sys.executable, "-c", "import sys; print(repr(sys.stdin.read()))"])
+    assert result.stdout == "''"
+
+
+def test_error_lines_skip_git_progress():
+    stderr = "\n".join([
+        "Enumerating objects: 5, done.",
+        "Writing objects:  50% (1/2)",
+        "remote: Resolving deltas: 100% (1/1)",
+        "remote: hook says no",
+        "",
+        "error: failed to push some refs",
+    ])
+    assert error_lines(stderr) == ["remote: hook says no", "error: failed to push some refs"]
+    assert error_lines(stderr, 1) == ["error: failed to push some refs"]
@@ -0,0 +1,69 @@
+"""Test push and cascade behaviour, including the host circuit breaker."""
+
+import subprocess
+from unittest.mock import patch
+
+from rich.console import Console
+
+from dotsync import sync
+from dotsync.health import HealthStore
+from dotsync.preflight import PULL, Preflight
+
+
+def _cascade(sample_config, tmp_path, force):
+    machine = sample_config.machines[0]
+    store = HealthStore(tmp_path / "health.json")
+    store.record(machine.name, ok=False)
+    store.record(machine.name, ok=False)
+    store.save()
+    console = Console(record=True, width=200)
+
+    def check_fleet(config, machines, head, retry=None):
+        return [Preflight(m, PULL) for m in machines]
+
+    ok = subprocess.CompletedProcess([], 0, "", "")
+    with patch("dotsync.sync.HealthStore", lambda: HealthStore(tmp_path / "health.json")), \
+         patch("dotsync.sync.check_fleet", side_effect=check_fleet), \
+         patch("dotsync.sync.run_remote", return_value=ok) as run, \
+         patch("dotsync.sync.save_push_result"), \
+         patch("dotsync.sync.record_events"), \
+         patch("dotsync.sync.LOG_DIR", tmp_path / "logs"):
+        sync._cascade(console, sample_config, [machine], "abc", force=force)
+    return run, console.export_text()
+
+
+def test_cooling_host_is_skipped_without_retry_hint(sample_config, tmp_path):
+    run, output = _cascade(sample_config, tmp_path, force=False)
+    assert run.call_count == 0
+    assert "cooling down until" in output
+    assert "machine(s) failed" not in output
+
+
+def test_forced_cascade_bypasses_cooldown(sample_config, tmp_path):
+    run, output = _cascade(sample_config, tmp_path, force=True)
+    assert run.call_count == 1
+    assert "ok" in output
+
+
+def test_push_failure_shows_error_not_progress(tmp_path, git):
+    origin, local = tmp_path / "origin.git", tmp_path / "local"
+
+    git(tmp_path, "init", "-q", "--bare", str(origin))
+    hook = origin / "hooks" / "pre-receive"
+    hook.write_text("#!/bin/sh\necho '[policy] pushes are frozen' >&2\nexit 1\n")
+    hook.chmod(0o755)
+    git(tmp_path, "clone", "-q", str(origin), str(local))
+    for i in range(20):
+        (local / f"file{i}").write_text(f"{i}\n" * 1000)
+    git(local, "add", "-A")
+    git(local, "commit", "-qm", "one")
+
+    console = Console(record=True, width=200)
+    with patch("dotsync.sync.LOG_DIR", tmp_path / "logs"):
+        assert sync._commit_and_push(console, str(local)) is None
+    output = console.export_text()
+
+    assert "remote: [policy] pushes are frozen" in output
+    assert "[remote rejected]" in output
+    assert "objects" not in output
+    assert f"full log: {tmp_path / 'logs' / 'push.log'}" in output